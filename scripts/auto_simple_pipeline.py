@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import yt_dlp as ytdlp
@@ -28,7 +29,7 @@ def main():
     p.add_argument("-o", "--out-dir", default="downloads", help="Output directory")
     p.add_argument("-m", "--model", default="small", help="Faster-Whisper model (tiny/base/small/medium/large-v3)")
     p.add_argument("--device", default="auto", choices=["auto", "cpu", "cuda"], help="Device")
-    p.add_argument("--compute-type", default="int8", help="Compute type (int8/float16/float32)")
+    p.add_argument("--compute-type", default=None, help="Compute type (int8/float16/float32; default: auto per device)")
     p.add_argument("--analyze-seconds", type=float, default=60.0, help="Seconds to analyze for best channel (default 60)")
     args = p.parse_args()
 
@@ -39,40 +40,25 @@ def main():
     audio_path = download_audio(args.url, out_dir)
     print(f"Audio downloaded: {audio_path}")
 
-    # 2) Pick best channel and write dual-mono MP3
     sys.path.insert(0, str(Path(__file__).resolve().parent))
-    from select_best_channel import main as pick_main  # type: ignore
+    from select_best_channel import select_and_write  # type: ignore
+    from transcribe_simple import get_model, resolve_device_and_compute, transcribe_file  # type: ignore
 
-    best_dual = out_dir / f"{audio_path.stem}.dualmono.mp3"
-    # Reinvoke selector as a function via argv emulation
-    argv_backup = sys.argv[:]  # save
-    try:
-        sys.argv = ["select_best_channel.py", str(audio_path), "-o", str(best_dual), "--sample-seconds", str(args.analyze_seconds)]
-        pick_main()
-    finally:
-        sys.argv = argv_backup
+    # 2) Pick best channel and write dual-mono WAV (no MP3 re-encode;
+    # Whisper reads WAV directly). Model load overlaps the ffmpeg work:
+    # get_model is lru_cached, so warming it here makes the later
+    # transcribe_file call hit the cache.
+    best_dual = out_dir / f"{audio_path.stem}.dualmono.wav"
+    device, compute_type = resolve_device_and_compute(args.device, args.compute_type)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        model_future = ex.submit(get_model, args.model, device, compute_type)
+        select_and_write(audio_path, best_dual, sample_seconds=args.analyze_seconds)
+        model_future.result()
     print(f"Dual-mono audio: {best_dual}")
 
     # 3) Transcribe (simple, no chunking/enhance)
-    from transcribe_simple import main as ts_main  # type: ignore
     srt_out = out_dir / f"{audio_path.stem}.dualmono.srt"
-    argv_backup = sys.argv[:]
-    try:
-        sys.argv = [
-            "transcribe_simple.py",
-            str(best_dual),
-            "-o",
-            str(srt_out),
-            "-m",
-            args.model,
-            "--device",
-            args.device,
-            "--compute-type",
-            args.compute_type,
-        ]
-        ts_main()
-    finally:
-        sys.argv = argv_backup
+    transcribe_file(best_dual, srt_out, args.model, device, compute_type)
 
     print("Pipeline done.")
     print(f"SRT: {srt_out}")
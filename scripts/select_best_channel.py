@@ -6,43 +6,116 @@ import math
 import os
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 import webrtcvad
 
+try:  # optional: fused single-pass reducer, falls back to NumPy if absent
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _scan_frames(signal_i16, frame_len, flags_u8):
+        """Fused per-frame RMS + speech/noise accumulation in one pass."""
+        speech_sum = 0.0
+        speech_cnt = 0
+        noise_sum = 0.0
+        noise_cnt = 0
+        overall_sq = 0.0
+        for i in range(flags_u8.shape[0]):
+            acc = 0.0
+            base = i * frame_len
+            for j in range(frame_len):
+                v = float(signal_i16[base + j])
+                acc += v * v
+            rms = math.sqrt(acc / frame_len + 1e-12)
+            if flags_u8[i]:
+                speech_sum += rms
+                speech_cnt += 1
+            else:
+                noise_sum += rms
+                noise_cnt += 1
+            overall_sq += acc
+        return speech_sum, speech_cnt, noise_sum, noise_cnt, overall_sq
+
+else:
+    _scan_frames = None
+
 
 def ensure_ffmpeg():
-    if shutil.which("ffmpeg") is None:
-        raise SystemExit("ffmpeg not found. Please install ffmpeg and retry.")
+    for tool in ("ffmpeg", "ffprobe"):
+        if shutil.which(tool) is None:
+            raise SystemExit(f"{tool} not found. Please install ffmpeg (including ffprobe) and retry.")
+
+
+def ffmpeg_thread_args() -> list:
+    """Explicit thread counts; ffmpeg defaults filter graphs to one thread."""
+    n = str(os.cpu_count() or 4)
+    return ["-threads", "0", "-filter_threads", n, "-filter_complex_threads", n]
+
+
+def probe_channels(src: Path) -> int:
+    """Return the channel count of the first audio stream (0 if unknown)."""
+    probe = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "a:0",
+            "-show_entries",
+            "stream=channels",
+            "-of",
+            "default=nk=1:nw=1",
+            str(src),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return int(probe.stdout.strip())
+    except ValueError:
+        return 0
+
 
+def decode_stereo_pcm(src: Path, sample_seconds: float = 0.0, sr: int = 16000) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode to stereo s16le PCM piped to stdout and deinterleave.
 
-def extract_channel_wav(src: Path, chan: str, dest: Path) -> None:
-    """Extract a single channel to 16k mono PCM WAV.
-    chan: 'left' or 'right'
+    One decode pass, no intermediate files; trim is folded in via -t.
     """
-    if chan not in {"left", "right"}:
-        raise ValueError("chan must be 'left' or 'right'")
-    pan = "pan=mono|c0=c0" if chan == "left" else "pan=mono|c0=c1"
-    cmd = [
-        "ffmpeg",
-        "-hide_banner",
-        "-y",
+    cmd = ["ffmpeg", "-hide_banner", "-v", "error"] + ffmpeg_thread_args()
+    if sample_seconds and sample_seconds > 0:
+        cmd += ["-t", f"{sample_seconds}"]
+    cmd += [
         "-i",
         str(src),
-        "-af",
-        pan,
+        # Audio only: don't decode video/subtitle/data streams the source
+        # (.webm/.mp4 downloads) may carry
+        "-vn",
+        "-sn",
+        "-dn",
+        "-map",
+        "0:a:0",
         "-ac",
-        "1",
+        "2",
         "-ar",
-        "16000",
-        "-c:a",
-        "pcm_s16le",
-        str(dest),
+        str(sr),
+        "-f",
+        "s16le",
+        "pipe:1",
     ]
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE)
+    pcm = np.frombuffer(proc.stdout, dtype=np.int16)
+    pcm = pcm[: len(pcm) - (len(pcm) % 2)].reshape(-1, 2)
+    return np.ascontiguousarray(pcm[:, 0]), np.ascontiguousarray(pcm[:, 1])
 
 
 @dataclass
@@ -54,46 +127,73 @@ class ChannelMetrics:
     overall_rms: float
 
 
-def read_wav_int16(path: Path) -> np.ndarray:
-    import soundfile as sf  # soundfile comes with many envs via libs; fallback to ffmpeg if missing
-
-    data, sr = sf.read(str(path), dtype="int16")
-    if sr != 16000:
-        raise SystemExit(f"Unexpected sample rate {sr}, expected 16000")
-    if data.ndim != 1:
-        data = data[:, 0]
-    return data
-
+def compute_metrics_int16_mono(
+    signal: np.ndarray, frame_ms: int = 20, vad_mode: int = 2, method: str = "energy", sr: int = 16000
+) -> ChannelMetrics:
+    """Score a mono int16 signal.
 
-def compute_metrics_int16_mono(signal: np.ndarray, frame_ms: int = 20, vad_mode: int = 2) -> ChannelMetrics:
-    vad = webrtcvad.Vad(vad_mode)
-    sr = 16000
+    method 'energy' classifies frames by dBFS relative to the peak frame —
+    fully vectorized, no per-frame Python calls. 'webrtc' keeps the
+    webrtcvad per-frame loop. Either is fine for L/R selection since both
+    channels are scored with the same method. sr may be 8000 or 16000
+    (both supported by webrtcvad).
+    """
     frame_len = int(sr * frame_ms / 1000)
     # Ensure multiple of frame_len
     n = len(signal) - (len(signal) % frame_len)
     if n <= 0:
         return ChannelMetrics(0.0, -120.0, 1e-9, 1e-9, 1e-9)
     signal = signal[:n]
-    # Frame bytes for VAD
     frames = signal.reshape(-1, frame_len)
-    speech_flags = []
-    speech_energies = []
-    noise_energies = []
-    for f in frames:
-        # Convert to bytes little-endian
-        fb = f.astype(np.int16).tobytes()
-        is_speech = vad.is_speech(fb, sr)
-        speech_flags.append(is_speech)
-        rms = np.sqrt(np.mean((f.astype(np.float32)) ** 2) + 1e-12)
-        if is_speech:
-            speech_energies.append(rms)
-        else:
-            noise_energies.append(rms)
-    speech_ratio = float(np.mean(speech_flags)) if speech_flags else 0.0
-    speech_rms = float(np.mean(speech_energies)) if speech_energies else 1e-9
-    noise_rms = float(np.mean(noise_energies)) if noise_energies else 1e-9
-    overall_rms = float(np.sqrt(np.mean((signal.astype(np.float32)) ** 2) + 1e-12))
-    snr_db = 20.0 * math.log10(max(speech_rms, 1e-9) / max(noise_rms, 1e-9))
+
+    if method == "webrtc":
+        vad = webrtcvad.Vad(vad_mode)
+        # VAD needs per-frame bytes; expose the buffer once and slice it
+        # instead of allocating a fresh bytes object per frame
+        raw = np.ascontiguousarray(signal, dtype=np.int16).tobytes()
+        stride = frame_len * 2  # int16 = 2 bytes/sample
+        flags = np.empty(len(frames), dtype=bool)
+        for i in range(len(frames)):
+            flags[i] = vad.is_speech(raw[i * stride:(i + 1) * stride], sr)
+        if _scan_frames is not None:
+            # Fused JIT pass: no float32 intermediates, one scan over the signal
+            s_sum, s_cnt, n_sum, n_cnt, overall_sq = _scan_frames(signal, frame_len, flags.view(np.uint8))
+            speech_rms = s_sum / s_cnt if s_cnt else 1e-9
+            noise_rms = n_sum / n_cnt if n_cnt else 1e-9
+            overall_rms = math.sqrt(overall_sq / n + 1e-12)
+            speech_ratio = float(flags.mean())
+            if s_cnt == 0 or n_cnt == 0:
+                # All-speech or all-noise: no partition to compare, don't let
+                # the 1e-9 sentinel inflate the ratio
+                snr_db = 0.0
+            else:
+                snr_db = 20.0 * math.log10(max(speech_rms, 1e-9) / max(noise_rms, 1e-9))
+            return ChannelMetrics(speech_ratio, snr_db, speech_rms, noise_rms, overall_rms)
+    else:
+        flags = None
+
+    # Vectorized per-frame RMS with integer MACs: widen int16 -> int32 (the
+    # square would overflow int16), accumulate exactly in int64, and only go
+    # to float for the final sqrt. Half the memory traffic of a float32 cast.
+    frames_i32 = frames.astype(np.int32)
+    sq_sums = (frames_i32 * frames_i32).sum(axis=1, dtype=np.int64)
+    frame_rms = np.sqrt(sq_sums.astype(np.float32) / frame_len + 1e-12)
+    if flags is None:
+        # Energy VAD: speech = frames within 25 dB of the loudest frame AND
+        # above an absolute -60 dBFS floor, so a silent or uniform-noise
+        # channel isn't classified as all-speech relative to its own peak
+        frame_dbfs = 20.0 * np.log10(np.maximum(frame_rms, 1e-9) / 32768.0)
+        flags = (frame_dbfs > (frame_dbfs.max() - 25.0)) & (frame_dbfs > -60.0)
+    speech_ratio = float(flags.mean())
+    speech_rms = float(frame_rms[flags].mean()) if flags.any() else 1e-9
+    noise_rms = float(frame_rms[~flags].mean()) if not flags.all() else 1e-9
+    overall_rms = float(np.sqrt(sq_sums.sum() / n + 1e-12))
+    if flags.all() or not flags.any():
+        # All-speech or all-noise: no partition to compare, don't let the
+        # 1e-9 sentinel inflate the ratio
+        snr_db = 0.0
+    else:
+        snr_db = 20.0 * math.log10(max(speech_rms, 1e-9) / max(noise_rms, 1e-9))
     return ChannelMetrics(speech_ratio, snr_db, speech_rms, noise_rms, overall_rms)
 
 
@@ -108,91 +208,102 @@ def choose_channel(mL: ChannelMetrics, mR: ChannelMetrics) -> Tuple[str, Channel
     return ("left", mL) if mL.overall_rms >= mR.overall_rms else ("right", mR)
 
 
-def make_dualmono(src: Path, use_channel: str, out_path: Path, bitrate: str = "192k") -> None:
+def make_dualmono(src: Path, use_channel: str, out_path: Path) -> None:
+    # PCM WAV: Whisper takes it directly, and the write is memcpy-speed
+    # versus a real-time psychoacoustic MP3 encode
     mapping = "pan=stereo|c0=c0|c1=c0" if use_channel == "left" else "pan=stereo|c0=c1|c1=c1"
     cmd = [
         "ffmpeg",
         "-hide_banner",
         "-y",
+        *ffmpeg_thread_args(),
         "-i",
         str(src),
+        "-vn",
+        "-sn",
+        "-dn",
+        "-map",
+        "0:a:0",
         "-af",
         mapping,
         "-c:a",
-        "libmp3lame",
-        "-b:a",
-        bitrate,
+        "pcm_s16le",
         str(out_path),
     ]
     subprocess.run(cmd, check=True)
 
 
-def main():
-    ap = argparse.ArgumentParser(description="Pick the better speech channel (L/R) using VAD+SNR and optionally output a dual-mono MP3")
-    ap.add_argument("input", help="Path to input .mp3/.wav/.m4a/.mp4 (audio extractable)")
-    ap.add_argument("-o", "--out", help="Output dual-mono MP3 path (optional)")
-    ap.add_argument("--prefer", choices=["auto", "left", "right"], default="auto", help="Force a channel or auto-pick (default auto)")
-    ap.add_argument("--bitrate", default="192k", help="Output bitrate for MP3 (default 192k)")
-    ap.add_argument("--sample-seconds", type=float, default=0.0, help="Analyze only first N seconds (0 = full)")
-    args = ap.parse_args()
+def select_and_write(
+    src: Path,
+    out: Optional[Path] = None,
+    prefer: str = "auto",
+    sample_seconds: float = 0.0,
+    vad: str = "energy",
+) -> str:
+    """Pick the better speech channel and optionally write a dual-mono WAV.
 
+    Returns the chosen channel ('left' or 'right').
+    """
     ensure_ffmpeg()
-    src = Path(args.input).expanduser().resolve()
-    work = src.parent
-    # Optional trim for speed
-    if args.sample_seconds and args.sample_seconds > 0:
-        sampled = work / (src.stem + ".sample.wav")
-        cmd = [
-            "ffmpeg", "-hide_banner", "-y",
-            "-t", f"{args.sample_seconds}",
-            "-i", str(src),
-            "-ac", "2", "-ar", "16000", "-c:a", "pcm_s16le",
-            str(sampled),
-        ]
-        subprocess.run(cmd, check=True)
-        base_input = sampled
-    else:
-        base_input = src
+    src = src.expanduser().resolve()
 
-    left_wav = work / (src.stem + ".left.wav")
-    right_wav = work / (src.stem + ".right.wav")
-    extract_channel_wav(base_input, "left", left_wav)
-    extract_channel_wav(base_input, "right", right_wav)
+    # Mono sources have nothing to choose between; skip the analysis pass
+    # (the pan filter in make_dualmono is a plain mux for mono input)
+    if probe_channels(src) <= 1:
+        print("Mono source, skipping channel selection")
+        if out:
+            make_dualmono(src, "left", out)
+            print(f"Dual-mono written: {out}")
+        return "left"
 
-    # Load and score
-    try:
-        import soundfile as sf  # type: ignore
-    except Exception as e:
-        raise SystemExit("Python package 'soundfile' is required for analysis.") from e
-
-    dataL, srL = sf.read(str(left_wav), dtype="int16")
-    dataR, srR = sf.read(str(right_wav), dtype="int16")
-    if srL != 16000 or srR != 16000:
-        raise SystemExit("Unexpected sample rate (expected 16000 Hz)")
-    if dataL.ndim != 1:
-        dataL = dataL[:, 0]
-    if dataR.ndim != 1:
-        dataR = dataR[:, 0]
-
-    mL = compute_metrics_int16_mono(dataL)
-    mR = compute_metrics_int16_mono(dataR)
-
-    if args.prefer == "left":
-        chosen, metrics = "left", mL
-    elif args.prefer == "right":
-        chosen, metrics = "right", mR
+    # Single decode: trim + downmix + resample fused into one ffmpeg pass,
+    # PCM streamed straight into NumPy (no .sample/.left/.right temp files).
+    # 8 kHz is plenty for relative L/R scoring and halves the samples to scan;
+    # the dual-mono output still comes from the untouched source.
+    analysis_sr = 8000
+    dataL, dataR = decode_stereo_pcm(src, sample_seconds, sr=analysis_sr)
+
+    # Score both channels in parallel; webrtcvad and NumPy release the GIL
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fL = ex.submit(compute_metrics_int16_mono, dataL, method=vad, sr=analysis_sr)
+        fR = ex.submit(compute_metrics_int16_mono, dataR, method=vad, sr=analysis_sr)
+        mL, mR = fL.result(), fR.result()
+
+    if prefer == "left":
+        chosen = "left"
+    elif prefer == "right":
+        chosen = "right"
     else:
-        chosen, metrics = choose_channel(mL, mR)
+        chosen, _ = choose_channel(mL, mR)
 
     print("Channel metrics:")
     print(f"  left : speech_ratio={mL.speech_ratio:.2f} snr={mL.snr_db:.1f}dB rms_s={mL.speech_rms:.5f} rms_n={mL.noise_rms:.5f}")
     print(f"  right: speech_ratio={mR.speech_ratio:.2f} snr={mR.snr_db:.1f}dB rms_s={mR.speech_rms:.5f} rms_n={mR.noise_rms:.5f}")
     print(f"Chosen channel: {chosen}")
 
-    if args.out:
-        out_path = Path(args.out).expanduser().resolve()
-        make_dualmono(src, chosen, out_path, bitrate=args.bitrate)
-        print(f"Dual-mono written: {out_path}")
+    if out:
+        make_dualmono(src, chosen, out)
+        print(f"Dual-mono written: {out}")
+    return chosen
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pick the better speech channel (L/R) using VAD+SNR and optionally output a dual-mono WAV")
+    ap.add_argument("input", help="Path to input .mp3/.wav/.m4a/.mp4 (audio extractable)")
+    ap.add_argument("-o", "--out", help="Output dual-mono WAV path (optional)")
+    ap.add_argument("--prefer", choices=["auto", "left", "right"], default="auto", help="Force a channel or auto-pick (default auto)")
+    ap.add_argument("--sample-seconds", type=float, default=0.0, help="Analyze only first N seconds (0 = full)")
+    ap.add_argument("--vad", choices=["energy", "webrtc"], default="energy", help="Frame classifier for scoring (default energy)")
+    args = ap.parse_args()
+
+    out_path = Path(args.out).expanduser().resolve() if args.out else None
+    select_and_write(
+        Path(args.input),
+        out_path,
+        prefer=args.prefer,
+        sample_seconds=args.sample_seconds,
+        vad=args.vad,
+    )
 
 
 if __name__ == "__main__":
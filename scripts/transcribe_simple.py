@@ -1,30 +1,108 @@
 #!/usr/bin/env python3
 import argparse
+import functools
 from pathlib import Path
-from typing import List
+from typing import Optional, Tuple
 
 from faster_whisper import WhisperModel
 
 
-def srt_timestamp(ms: int) -> str:
-    hh = ms // 3_600_000
-    mm = (ms % 3_600_000) // 60_000
-    ss = (ms % 60_000) // 1000
-    mmm = ms % 1000
-    return f"{hh:02}:{mm:02}:{ss:02},{mmm:03}"
+def write_srt(path: Path, segments, base_offset_ms: int = 0) -> None:
+    # Stream each segment as it arrives so disk writes overlap inference
+    # and the transcript never sits fully in memory. Binary %-formatting
+    # with a divmod chain is the cheapest way to emit the timestamps.
+    with path.open("wb", buffering=1 << 16) as fh:
+        for i, s in enumerate(segments, 1):
+            st = int(s.start * 1000) + base_offset_ms
+            et = int(s.end * 1000) + base_offset_ms
+            s_ss, s_ms = divmod(st, 1000)
+            s_mm, s_ss = divmod(s_ss, 60)
+            s_hh, s_mm = divmod(s_mm, 60)
+            e_ss, e_ms = divmod(et, 1000)
+            e_mm, e_ss = divmod(e_ss, 60)
+            e_hh, e_mm = divmod(e_mm, 60)
+            txt = (s.text or "").strip()
+            fh.write(
+                b"%d\n%02d:%02d:%02d,%03d --> %02d:%02d:%02d,%03d\n"
+                % (i, s_hh, s_mm, s_ss, s_ms, e_hh, e_mm, e_ss, e_ms)
+            )
+            fh.write(txt.encode("utf-8"))
+            fh.write(b"\n\n")
 
 
-def write_srt(path: Path, segments, base_offset_ms: int = 0) -> None:
-    lines: List[str] = []
-    for i, s in enumerate(segments, 1):
-        st = int(s.start * 1000) + base_offset_ms
-        et = int(s.end * 1000) + base_offset_ms
-        txt = (s.text or "").strip()
-        lines.append(str(i))
-        lines.append(f"{srt_timestamp(st)} --> {srt_timestamp(et)}")
-        lines.append(txt)
-        lines.append("")
-    path.write_text("\n".join(lines).strip() + "\n", encoding="utf-8")
+@functools.lru_cache(maxsize=1)
+def _detect_device() -> str:
+    """Resolve 'auto' to cuda/cpu once per process; importing torch is slow."""
+    try:
+        import torch  # type: ignore
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def resolve_device_and_compute(device: str = "auto", compute_type: Optional[str] = None) -> Tuple[str, str]:
+    """Resolve 'auto' device and the compute-type sentinel to concrete values."""
+    if device == "auto":
+        device = _detect_device()
+    if compute_type is None:
+        # FP16 tensor cores beat int8 emulation on CUDA; Ampere+ can blend both
+        if device == "cuda":
+            try:
+                import torch  # type: ignore
+                ampere_plus = torch.cuda.get_device_capability()[0] >= 8
+            except Exception:
+                ampere_plus = False
+            compute_type = "int8_float16" if ampere_plus else "float16"
+        else:
+            compute_type = "int8"
+        print(f"Auto-selected compute type: {compute_type}")
+    return device, compute_type
+
+
+@functools.lru_cache(maxsize=2)
+def get_model(name: str, device: str, compute_type: str) -> WhisperModel:
+    """Load a WhisperModel once per (name, device, compute_type) and reuse it."""
+    print(f"Loading Faster-Whisper model {name} on {device} ({compute_type})...")
+    return WhisperModel(name, device=device, compute_type=compute_type)
+
+
+def transcribe_file(
+    src: Path,
+    out: Path,
+    model_name: str = "small",
+    device: str = "auto",
+    compute_type: Optional[str] = None,
+    language: Optional[str] = None,
+    batch_size: int = 8,
+    vad_filter: bool = True,
+) -> Path:
+    """Transcribe one file to SRT, reusing a cached model across calls."""
+    device, compute_type = resolve_device_and_compute(device, compute_type)
+    model = get_model(model_name, device, compute_type)
+
+    options = dict(beam_size=5, temperature=0.0)
+    if language:
+        options["language"] = language
+    if vad_filter:
+        # Silero VAD skips silence/music so no FLOPs are spent on non-speech
+        options["vad_filter"] = True
+        options["vad_parameters"] = dict(min_silence_duration_ms=500)
+
+    if device == "cuda" and vad_filter:
+        # Batch windows into one tensor for better GPU utilization. The
+        # batched pipeline needs VAD clip timestamps (and defaults
+        # vad_filter=True regardless of options), so with --no-vad we fall
+        # back to sequential transcribe to honor the flag.
+        from faster_whisper import BatchedInferencePipeline
+
+        batched = BatchedInferencePipeline(model=model)
+        segments, info = batched.transcribe(str(src), batch_size=batch_size, **options)
+    else:
+        segments, info = model.transcribe(str(src), **options)
+    print(f"Detected language: {info.language} (prob={info.language_probability:.2f})")
+    write_srt(out, segments)
+    print(f"Saved SRT: {out}")
+    return out
 
 
 def main():
@@ -33,33 +111,24 @@ def main():
     p.add_argument("-o", "--out", help="Output SRT path (defaults to <input>.srt)")
     p.add_argument("-m", "--model", default="small", help="Model: tiny/base/small/medium/large-v3 (default small)")
     p.add_argument("--device", default="auto", choices=["auto", "cpu", "cuda"], help="Device to run on")
-    p.add_argument("--compute-type", default="int8", help="Compute type (e.g., int8, float16, float32)")
+    p.add_argument("--compute-type", default=None, help="Compute type (int8/float16/float32; default: auto per device)")
     p.add_argument("-l", "--language", help="Language code (e.g., zh). Default: auto-detect")
+    p.add_argument("--batch-size", type=int, default=8, help="Windows per batch on CUDA (default 8)")
+    p.add_argument("--no-vad", action="store_true", help="Disable the Silero VAD silence filter (also disables batching on CUDA)")
     args = p.parse_args()
 
     src = Path(args.input).expanduser().resolve()
     out = Path(args.out).expanduser().resolve() if args.out else src.with_suffix(".srt")
-
-    device = args.device
-    if device == "auto":
-        try:
-            import torch  # type: ignore
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-        except Exception:
-            device = "cpu"
-
-    print(f"Loading Faster-Whisper model {args.model} on {device} ({args.compute_type})...")
-    model = WhisperModel(args.model, device=device, compute_type=args.compute_type)
-
-    options = dict(beam_size=5, temperature=0.0)
-    if args.language:
-        options["language"] = args.language
-
-    segments, info = model.transcribe(str(src), **options)
-    seg_list = list(segments)
-    print(f"Detected language: {info.language} (prob={info.language_probability:.2f})")
-    write_srt(out, seg_list)
-    print(f"Saved SRT: {out}")
+    transcribe_file(
+        src,
+        out,
+        args.model,
+        args.device,
+        args.compute_type,
+        args.language,
+        batch_size=args.batch_size,
+        vad_filter=not args.no_vad,
+    )
 
 
 if __name__ == "__main__":